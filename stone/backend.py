@@ -414,33 +414,41 @@ class CodeBackend(Backend):
             self.emit(before + delim[0] + items[0] + delim[1] + after)
             return
 
+        # Lines are accumulated and emitted as a single block rather than with
+        # one emit() per item.
+        lines = []  # type: typing.List[typing.Text]
+
+        def add_line(s, indent):
+            # type: (typing.Text, typing.Text) -> None
+            assert '\n' not in s, \
+                'String to emit cannot contain newline strings.'
+            lines.append('%s%s\n' % (indent, s) if s else '\n')
+
+        indent = self.make_indent()
         if compact:
-            self.emit(before + delim[0] + items[0] + sep)
-            def emit_list(items):
-                items = items[1:]
-                for (i, item) in enumerate(items):
-                    if i == len(items) - 1:
-                        self.emit(item + delim[1] + after)
-                    else:
-                        self.emit(item + sep)
+            add_line(before + delim[0] + items[0] + sep, indent)
             if before or delim[0]:
                 with self.indent(len(before) + len(delim[0])):
-                    emit_list(items)
+                    item_indent = self.make_indent()
             else:
-                emit_list(items)
+                item_indent = indent
+            rest = items[1:]
+            for item in rest[:-1]:
+                add_line(item + sep, item_indent)
+            add_line(rest[-1] + delim[1] + after, item_indent)
         else:
             if before or delim[0]:
-                self.emit(before + delim[0])
+                add_line(before + delim[0], indent)
             with self.indent():
-                for (i, item) in enumerate(items):
-                    if i == len(items) - 1 and skip_last_sep:
-                        self.emit(item)
-                    else:
-                        self.emit(item + sep)
+                item_indent = self.make_indent()
+            for (i, item) in enumerate(items):
+                if i == len(items) - 1 and skip_last_sep:
+                    add_line(item, item_indent)
+                else:
+                    add_line(item + sep, item_indent)
             if delim[1] or after:
-                self.emit(delim[1] + after)
-            elif delim[1]:
-                self.emit(delim[1])
+                add_line(delim[1] + after, indent)
+        self.emit_raw(''.join(lines))
 
     @contextmanager
     def block(
@@ -1,5 +1,6 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import functools
 import re
 
 _split_words_capitalization_re = re.compile(
@@ -8,6 +9,12 @@ _split_words_capitalization_re = re.compile(
 _split_words_dashes_re = re.compile('[-_/]+')
 
 
+# The fmt_* helpers below are pure functions of the name. Backends format the
+# same namespace, type, route and field names over and over, and the
+# regex-based word splitting is comparatively expensive, so their results are
+# cached. split_words() itself is not cached since it returns a mutable list.
+
+
 def split_words(name):
     """
     Splits name based on capitalization, dashes, and underscores.
@@ -24,6 +31,7 @@ def split_words(name):
     return all_words
 
 
+@functools.lru_cache(maxsize=1024)
 def fmt_camel(name):
     """
     Converts name to lower camel case. Words are identified by capitalization,
@@ -35,6 +43,7 @@ def fmt_camel(name):
     return first + ''.join([word.capitalize() for word in words])
 
 
+@functools.lru_cache(maxsize=1024)
 def fmt_dashes(name):
     """
     Converts name to words separated by dashes. Words are identified by
@@ -43,6 +52,7 @@ def fmt_dashes(name):
     return '-'.join([word.lower() for word in split_words(name)])
 
 
+@functools.lru_cache(maxsize=1024)
 def fmt_pascal(name):
     """
     Converts name to pascal case. Words are identified by capitalization,
@@ -51,6 +61,7 @@ def fmt_pascal(name):
     return ''.join([word.capitalize() for word in split_words(name)])
 
 
+@functools.lru_cache(maxsize=1024)
 def fmt_underscores(name):
     """
     Converts name to words separated by underscores. Words are identified by
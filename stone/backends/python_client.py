@@ -1,6 +1,8 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import itertools
 import re
+import textwrap
 
 from stone.backend import CodeBackend
 from stone.backends.helpers import fmt_underscores
@@ -17,20 +19,35 @@ from stone.backends.python_types import (
     class_name_for_data_type,
 )
 from stone.ir import (
+    DataType,
+    List,
+    Map,
+    Nullable,
+    Struct,
+    UserDefined,
+    Void,
     is_nullable_type,
-    is_list_type,
-    is_map_type,
     is_struct_type,
     is_tag_ref,
     is_union_type,
     is_user_defined_type,
     is_void_type,
 )
+from stone.typing_hacks import cast
 
 _MYPY = False
 if _MYPY:
     import typing  # noqa: F401 # pylint: disable=import-error,unused-import,useless-suppression
 
+    from stone.ir import (  # noqa: F401
+        Api,
+        ApiNamespace,
+        ApiRoute,
+    )
+
+    # (text, subsequent_prefix) pairs consumed by _emit_docstring_lines().
+    DocstringLine = typing.Tuple[typing.Text, typing.Optional[typing.Text]]
+
 # Hack to get around some of Python 2's standard library modules that
 # accept ascii-encodable unicode literals in lieu of strs, but where
 # actually passing such literals results in errors with mypy --py2. See
@@ -50,6 +67,68 @@ base = """\
 from abc import ABCMeta, abstractmethod
 """
 
+# The generated class and the abstract request() method that every route
+# method dispatches to.
+_class_header_template = """\
+class {class_name}(object):
+    __metaclass__ = ABCMeta
+
+    @abstractmethod
+    def request(self, route, namespace, arg, arg_binary=None):
+        pass
+
+"""
+
+_namespace_header_template = """\
+# ------------------------------------------
+# Routes in {namespace_name} namespace
+
+"""
+
+_route_request_template = """\
+r = self.request(
+    {{ns}}.{{route_func}},
+    '{{namespace_name}}',
+    arg,
+    {arg_binary},
+)
+"""
+
+
+def _make_route_body_template(arg_is_void, request_binary_body,
+                              download_to_file, result_is_void):
+    # type: (bool, bool, bool, bool) -> typing.Text
+    """
+    Returns the template for a route method's body after its docstring and
+    deprecation warning, followed by the blank line that ends the method.
+    Struct arguments are constructed before it; void arguments are set to
+    None as part of it.
+    """
+    template = 'arg = None\n' if arg_is_void else ''
+    template += _route_request_template.format(
+        arg_binary='f' if request_binary_body else 'None')
+    if download_to_file:
+        template += 'self._save_body_to_file(download_path, r[1])\n'
+        template += 'return None\n' if result_is_void else 'return r[0]\n'
+    else:
+        template += 'return None\n' if result_is_void else 'return r\n'
+    return template + '\n'
+
+# Route method bodies keyed by (arg_is_void, request_binary_body,
+# download_to_file, result_is_void), so that generating a route only has to
+# pick one and fill in its names.
+_route_body_templates = {
+    flags: _make_route_body_template(*flags)
+    for flags in itertools.product((False, True), repeat=4)
+}
+
+_deprecation_warning_template = """\
+warnings.warn(
+    '{msg}',
+    DeprecationWarning,
+)
+"""
+
 # Matches format of Babel doc tags
 doc_sub_tag_re = re.compile(':(?P<tag>[A-z]*):`(?P<val>.*?)`')
 
@@ -60,6 +139,14 @@ recommend using the `contextlib.closing
 <https://docs.python.org/2/library/contextlib.html#contextlib.closing>`_
 context manager to ensure this."""
 
+# Sphinx type references and fields used in generated docstrings.
+_USER_DEFINED_DOC_FMT = ':class:`%s.%s.%s`'
+_NULLABLE_DOC_FMT = 'Nullable[%s]'
+_LIST_DOC_FMT = 'List[%s]'
+_MAP_DOC_FMT = 'Map[%s, %s]'
+_TYPE_ARG_DOC_FMT = ':type arg: %s'
+_RTYPE_DOC_FMT = ':rtype: %s'
+
 _cmdline_parser = argparse.ArgumentParser(
     prog='python-client-backend',
     description=(
@@ -110,71 +197,131 @@ _cmdline_parser.add_argument(
 class PythonClientBackend(CodeBackend):
 
     cmdline_parser = _cmdline_parser
-    supported_auth_types = None
+    supported_auth_types = None  # type: typing.Optional[typing.FrozenSet[typing.Text]]
+    # Instance var of the current namespace being generated
+    cur_namespace = None  # type: typing.Optional[ApiNamespace]
+
+    def __init__(self, *args, **kwargs):
+        # type: (...) -> None
+        super(PythonClientBackend, self).__init__(*args, **kwargs)
+        # Maps (namespace name, data type) to the result of
+        # _format_type_in_doc(). Data types hash by identity.
+        self._type_in_doc_cache = \
+            {}  # type: typing.Dict[typing.Tuple[typing.Text, DataType], typing.Text]
+        # Maps (namespace name, Stone doc) to its processed form. Struct
+        # field docs are repeated in the docstring of every route that takes
+        # the struct.
+        self._processed_doc_cache = \
+            {}  # type: typing.Dict[typing.Tuple[typing.Text, typing.Text], typing.Text]
+        # Set once a route method that calls warnings.warn() is generated.
+        self._needs_warnings_import = False
 
     def generate(self, api):
+        # type: (Api) -> None
         """Generates a module called "base".
 
         The module will contain a base class that will have a method for
         each route across all namespaces.
         """
+        assert self.args is not None
 
         with self.output_to_relative_path('%s.py' % self.args.module_name):
+            imported_namespaces, namespaces_with_routes = self._scan_api(api)
             self.emit_raw(base)
-            # Import "warnings" if any of the routes are deprecated.
-            found_deprecated = False
-            for namespace in api.namespaces.values():
-                for route in namespace.routes:
-                    if route.deprecated:
-                        self.emit('import warnings')
-                        found_deprecated = True
-                        break
-                if found_deprecated:
-                    break
+            # Import "warnings" if any of the generated routes are deprecated.
+            # That is only known once the routes have been generated, so the
+            # import is filled in afterwards.
+            self.emit_placeholder('warnings_import')
             self.emit()
-            self._generate_imports(api.namespaces.values())
+            self._generate_imports(imported_namespaces)
             self.emit()
             self.emit()  # PEP-8 expects two-blank lines before class def
-            self.emit('class %s(object):' % self.args.class_name)
+            self._emit_template(_class_header_template,
+                                class_name=self.args.class_name)
             with self.indent():
-                self.emit('__metaclass__ = ABCMeta')
-                self.emit()
-                self.emit('@abstractmethod')
-                self.emit(
-                    'def request(self, route, namespace, arg, arg_binary=None):')
-                with self.indent():
-                    self.emit('pass')
-                self.emit()
-                self._generate_route_methods(api.namespaces.values())
+                self._generate_route_methods(namespaces_with_routes)
+            self.add_named_placeholder(
+                'warnings_import',
+                'import warnings\n' if self._needs_warnings_import else '')
+
+    def _scan_api(self, api):
+        # type: (Api) -> typing.Tuple[typing.List[ApiNamespace], typing.List[ApiNamespace]]
+        """
+        Collects everything generate() needs to know about the namespaces in a
+        single pass over the API.
+
+        Returns a tuple of the namespaces that define data types (and so must
+        be imported) and the namespaces that define routes.
+        """
+        imported_namespaces = []  # type: typing.List[ApiNamespace]
+        namespaces_with_routes = []  # type: typing.List[ApiNamespace]
+        for namespace in api.namespaces.values():
+            if namespace.data_types:
+                imported_namespaces.append(namespace)
+            if namespace.routes:
+                namespaces_with_routes.append(namespace)
+        return imported_namespaces, namespaces_with_routes
+
+    def _emit_template(self, template, **kwargs):
+        # type: (typing.Text, **typing.Text) -> None
+        """
+        Renders a module-level code template and emits it as a single block
+        at the current indentation. Blank lines are left unindented.
+        """
+        indent = self.make_indent()
+        rendered = template.format(**kwargs)
+        if indent:
+            rendered = ''.join(
+                indent + line if line != '\n' else line
+                for line in rendered.splitlines(True))
+        self.emit_raw(rendered)
+
+    def _emit_compact_list(self, items, before, after=''):
+        # type: (typing.List[typing.Text], typing.Text, typing.Text) -> None
+        """
+        Emits ``before(item, ...)after`` as a single block, laid out like the
+        compact mode of generate_multiline_list(): one item per line, aligned
+        with the first item after the opening parenthesis.
+        """
+        if len(items) <= 1:
+            self.emit('%s(%s)%s' % (before, items[0] if items else '', after))
+            return
+        indent = self.make_indent()
+        separator = ',\n' + indent + ' ' * (len(before) + 1)
+        self.emit_raw('%s%s(%s)%s\n' % (indent, before, separator.join(items), after))
 
     def _generate_imports(self, namespaces):
-        # Only import namespaces that have user-defined types defined.
+        # type: (typing.Iterable[ApiNamespace]) -> None
+        # Callers pass only the namespaces that have user-defined types defined.
+        assert self.args is not None
         for namespace in namespaces:
-            if namespace.data_types:
-                self.emit('from {} import {}'.format(self.args.types_package, fmt_namespace(namespace.name)))
+            self.emit('from {} import {}'.format(self.args.types_package, fmt_namespace(namespace.name)))
 
     def _generate_route_methods(self, namespaces):
+        # type: (typing.Iterable[ApiNamespace]) -> None
         """Creates methods for the routes in each namespace. All data types
-        and routes are represented as Python classes."""
+        and routes are represented as Python classes. Callers pass only the
+        namespaces that define routes."""
         self.cur_namespace = None
         for namespace in namespaces:
-            if namespace.routes:
-                self.emit('# ------------------------------------------')
-                self.emit('# Routes in {} namespace'.format(namespace.name))
-                self.emit()
-                self._generate_routes(namespace)
+            self._emit_template(_namespace_header_template,
+                                namespace_name=namespace.name)
+            self._generate_routes(namespace)
 
     def _generate_routes(self, namespace):
+        # type: (ApiNamespace) -> None
         """
         Generates Python methods that correspond to routes in the namespace.
         """
 
+        assert self.args is not None
         # Hack: needed for _docf()
         self.cur_namespace = namespace
-        # list of auth_types supported in this base class.
+        # set of auth_types supported in this base class.
         # this is passed with the new -w flag
         if self.args.auth_type is not None:
-            self.supported_auth_types = [auth_type.strip().lower() for auth_type in self.args.auth_type.split(',')]
+            self.supported_auth_types = frozenset(
+                auth_type.strip().lower() for auth_type in self.args.auth_type.split(','))
 
         check_route_name_conflict(namespace)
 
@@ -183,23 +330,22 @@ class PythonClientBackend(CodeBackend):
             # actual auth attr inluded in the route is ignored in this mode.
             if self.supported_auth_types is None:
                 self._generate_route_helper(namespace, route)
-                if route.attrs.get('style') == 'download':
+                if route.attrs is not None and route.attrs.get('style') == 'download':
                     self._generate_route_helper(namespace, route, True)
             else:
-                route_auth_attr = None
-                if route.attrs is not None:
-                    route_auth_attr = route.attrs.get('auth')
+                route_auth_attr = route.attrs.get('auth') if route.attrs is not None else None
                 if route_auth_attr is None:
                     continue
-                route_auth_modes = [mode.strip().lower() for mode in route_auth_attr.split(',')]
-                for base_auth_type in self.supported_auth_types:
-                    if base_auth_type in route_auth_modes:
-                        self._generate_route_helper(namespace, route)
-                        if route.attrs.get('style') == 'download':
-                            self._generate_route_helper(namespace, route, True)
-                        break # to avoid duplicate method declaration in the same base class
+                route_auth_modes = (mode.strip().lower() for mode in route_auth_attr.split(','))
+                # A single declaration is generated however many of the
+                # route's auth modes this base class supports.
+                if not self.supported_auth_types.isdisjoint(route_auth_modes):
+                    self._generate_route_helper(namespace, route)
+                    if route.attrs is not None and route.attrs.get('style') == 'download':
+                        self._generate_route_helper(namespace, route, True)
 
     def _generate_route_helper(self, namespace, route, download_to_file=False):
+        # type: (ApiNamespace, ApiRoute, bool) -> None
         """Generate a Python method that corresponds to a route.
 
         :param namespace: Namespace that the route belongs to.
@@ -208,8 +354,12 @@ class PythonClientBackend(CodeBackend):
             that downloads the response body to a file should be generated.
             This can only be used for download-style routes.
         """
-        arg_data_type = route.arg_data_type
-        result_data_type = route.result_data_type
+        assert route.attrs is not None
+        arg_data_type = cast(DataType, route.arg_data_type)
+        result_data_type = cast(DataType, route.result_data_type)
+        arg_is_void = is_void_type(arg_data_type)
+        arg_is_struct = is_struct_type(arg_data_type)
+        result_is_void = is_void_type(result_data_type)
 
         request_binary_body = route.attrs.get('style') == 'upload'
         response_binary_body = route.attrs.get('style') == 'download'
@@ -246,7 +396,7 @@ class PythonClientBackend(CodeBackend):
                 footer = DOCSTRING_CLOSE_RESPONSE
 
             if route.doc:
-                func_docstring = self.process_doc(route.doc, self._docf)
+                func_docstring = self._process_doc(route.doc)
             else:
                 func_docstring = None
 
@@ -254,7 +404,7 @@ class PythonClientBackend(CodeBackend):
                 namespace,
                 arg_data_type,
                 result_data_type,
-                route.error_data_type,
+                cast(DataType, route.error_data_type),
                 overview=func_docstring,
                 extra_request_args=extra_request_args,
                 extra_return_arg=extra_return_arg,
@@ -263,48 +413,40 @@ class PythonClientBackend(CodeBackend):
 
             self._maybe_generate_deprecation_warning(route)
 
-            # Code to instantiate a class for the request data type
-            if is_void_type(arg_data_type):
-                self.emit('arg = None')
-            elif is_struct_type(arg_data_type):
-                self.generate_multiline_list(
-                    [f.name for f in arg_data_type.all_fields],
-                    before='arg = {}.{}'.format(
-                        fmt_namespace(arg_data_type.namespace.name),
-                        fmt_class(arg_data_type.name)),
+            # Code to instantiate a class for the request data type. Void
+            # arguments are handled by the body template.
+            if arg_is_struct:
+                arg_struct = cast(Struct, arg_data_type)
+                self._emit_compact_list(
+                    [f.name for f in arg_struct.all_fields],
+                    'arg = {}.{}'.format(
+                        fmt_namespace(arg_struct.namespace.name),
+                        fmt_class(arg_struct.name)),
                 )
-            elif not is_union_type(arg_data_type):
+            elif not arg_is_void and not is_union_type(arg_data_type):
                 raise AssertionError('Unhandled request type %r' %
                                      arg_data_type)
 
-            # Code to make the request
-            args = [
-                '{}.{}'.format(fmt_namespace(namespace.name),
-                               fmt_func(route.name, version=route.version)),
-                "'{}'".format(namespace.name),
-                'arg']
-            if request_binary_body:
-                args.append('f')
-            else:
-                args.append('None')
-            self.generate_multiline_list(args, 'r = self.request', compact=False)
-
-            if download_to_file:
-                self.emit('self._save_body_to_file(download_path, r[1])')
-                if is_void_type(result_data_type):
-                    self.emit('return None')
-                else:
-                    self.emit('return r[0]')
-            else:
-                if is_void_type(result_data_type):
-                    self.emit('return None')
-                else:
-                    self.emit('return r')
-        self.emit()
+            # Code to make the request and return its result
+            body_template = _route_body_templates[
+                (arg_is_void, request_binary_body, download_to_file, result_is_void)]
+            self._emit_template(
+                body_template,
+                ns=fmt_namespace(namespace.name),
+                route_func=fmt_func(route.name, version=route.version),
+                namespace_name=namespace.name,
+            )
 
     def _generate_route_method_decl(
-            self, namespace, route, arg_data_type, request_binary_body,
-            method_name_suffix='', extra_args=None):
+            self,
+            namespace,                # type: ApiNamespace
+            route,                    # type: ApiRoute
+            arg_data_type,            # type: DataType
+            request_binary_body,      # type: bool
+            method_name_suffix='',    # type: typing.Text
+            extra_args=None,          # type: typing.Optional[typing.List[typing.Text]]
+    ):
+        # type: (...) -> None
         """Generates the method prototype for a route."""
         args = ['self']
         if extra_args:
@@ -312,24 +454,25 @@ class PythonClientBackend(CodeBackend):
         if request_binary_body:
             args.append('f')
         if is_struct_type(arg_data_type):
-            for field in arg_data_type.all_fields:
-                if is_nullable_type(field.data_type):
-                    args.append('{}=None'.format(field.name))
+            args_append = args.append
+            for field in cast(Struct, arg_data_type).all_fields:
+                field_data_type = field.data_type
+                if is_nullable_type(field_data_type):
+                    args_append(field.name + '=None')
                 elif field.has_default:
                     # TODO(kelkabany): Decide whether we really want to set the
                     # default in the argument list. This will send the default
                     # over the wire even if it isn't overridden. The benefit is
                     # it locks in a default even if it is changed server-side.
-                    if is_user_defined_type(field.data_type):
-                        ns = field.data_type.namespace
+                    if is_user_defined_type(field_data_type):
+                        ns = cast(UserDefined, field_data_type).namespace
                     else:
                         ns = None
-                    arg = '{}={}'.format(
+                    args_append('%s=%s' % (
                         field.name,
-                        self._generate_python_value(ns, field.default))
-                    args.append(arg)
+                        self._generate_python_value(ns, field.default)))
                 else:
-                    args.append(field.name)
+                    args_append(field.name)
         elif is_union_type(arg_data_type):
             args.append('arg')
         elif not is_void_type(arg_data_type):
@@ -338,25 +481,29 @@ class PythonClientBackend(CodeBackend):
 
         method_name = fmt_func(route.name + method_name_suffix, version=route.version)
         namespace_name = fmt_underscores(namespace.name)
-        self.generate_multiline_list(args, 'def {}_{}'.format(namespace_name, method_name), ':')
+        self._emit_compact_list(args, 'def {}_{}'.format(namespace_name, method_name), ':')
 
     def _maybe_generate_deprecation_warning(self, route):
+        # type: (ApiRoute) -> None
         if route.deprecated:
+            self._needs_warnings_import = True
             msg = '{} is deprecated.'.format(route.name)
             if route.deprecated.by:
                 msg += ' Use {}.'.format(route.deprecated.by.name)
-            args = ["'{}'".format(msg), 'DeprecationWarning']
-            self.generate_multiline_list(
-                args,
-                before='warnings.warn',
-                delim=('(', ')'),
-                compact=False,
-            )
-
-    def _generate_docstring_for_func(self, namespace, arg_data_type,
-                                     result_data_type=None, error_data_type=None,
-                                     overview=None, extra_request_args=None,
-                                     extra_return_arg=None, footer=None):
+            self._emit_template(_deprecation_warning_template, msg=msg)
+
+    def _generate_docstring_for_func(
+            self,
+            namespace,                # type: ApiNamespace
+            arg_data_type,            # type: DataType
+            result_data_type,         # type: DataType
+            error_data_type,          # type: DataType
+            overview=None,            # type: typing.Optional[typing.Text]
+            extra_request_args=None,  # type: typing.Optional[typing.List[typing.Tuple[typing.Text, typing.Text, typing.Text]]]  # noqa: E501
+            extra_return_arg=None,    # type: typing.Optional[typing.Text]
+            footer=None,              # type: typing.Optional[typing.Text]
+    ):
+        # type: (...) -> None
         """
         Generates a docstring for a function or method.
 
@@ -379,56 +526,60 @@ class PythonClientBackend(CodeBackend):
             will be a tuple of return_data_type and extra_return-arg.
         :param str footer: Additional notes at the end of the docstring.
         """
-        fields = [] if is_void_type(arg_data_type) else arg_data_type.fields
+        assert self.args is not None
+        arg_is_struct = is_struct_type(arg_data_type)
+        result_is_void = is_void_type(result_data_type)
+        fields = [] if is_void_type(arg_data_type) else cast(UserDefined, arg_data_type).fields
         if not fields and not overview:
             # If we don't have an overview or any input parameters, we skip the
             # docstring altogether.
             return
 
-        self.emit('"""')
+        # Each entry is a (text, subsequent_prefix) pair that is wrapped and
+        # emitted by _emit_docstring_lines(). A subsequent_prefix of None
+        # means the text is emitted verbatim without wrapping.
+        lines = [('"""', None)]  # type: typing.List[DocstringLine]
+        add_line = lines.append
         if overview:
-            self.emit_wrapped_text(overview)
+            add_line((overview, ''))
 
         # Description of all input parameters
         if extra_request_args or fields:
             if overview:
                 # Add a blank line if we had an overview
-                self.emit()
+                add_line(('', None))
 
             if extra_request_args:
                 for name, data_type_name, doc in extra_request_args:
                     if data_type_name:
                         field_doc = ':param {} {}: {}'.format(data_type_name,
                                                               name, doc)
-                        self.emit_wrapped_text(field_doc,
-                                               subsequent_prefix='    ')
+                        add_line((field_doc, '    '))
                     else:
-                        self.emit_wrapped_text(
-                            ':param {}: {}'.format(name, doc),
-                            subsequent_prefix='    ')
+                        add_line((':param {}: {}'.format(name, doc), '    '))
 
-            if is_struct_type(arg_data_type):
+            if arg_is_struct:
                 for field in fields:
+                    field_is_user_defined = is_user_defined_type(field.data_type)
                     if field.doc:
-                        if is_user_defined_type(field.data_type):
+                        if field_is_user_defined:
                             field_doc = ':param {}: {}'.format(
-                                field.name, self.process_doc(field.doc, self._docf))
+                                field.name, self._process_doc(field.doc))
                         else:
                             field_doc = ':param {} {}: {}'.format(
                                 self._format_type_in_doc(namespace, field.data_type),
                                 field.name,
-                                self.process_doc(field.doc, self._docf),
+                                self._process_doc(field.doc),
                             )
-                        self.emit_wrapped_text(
-                            field_doc, subsequent_prefix='    ')
-                        if is_user_defined_type(field.data_type):
+                        add_line((field_doc, '    '))
+                        if field_is_user_defined:
                             # It's clearer to declare the type of a composite on
                             # a separate line since it references a class in
                             # another module
-                            self.emit(':type {}: {}'.format(
+                            add_line((':type {}: {}'.format(
                                 field.name,
                                 self._format_type_in_doc(namespace, field.data_type),
-                            ))
+                            ), None))
                     else:
                         # If the field has no docstring, then just document its
                         # type.
@@ -436,122 +587,222 @@ class PythonClientBackend(CodeBackend):
                             field.name,
                             self._format_type_in_doc(namespace, field.data_type),
                         )
-                        self.emit_wrapped_text(field_doc)
+                        add_line((field_doc, ''))
 
             elif is_union_type(arg_data_type):
-                if arg_data_type.doc:
-                    self.emit_wrapped_text(':param arg: {}'.format(
-                        self.process_doc(arg_data_type.doc, self._docf)),
-                        subsequent_prefix='    ')
-                self.emit(':type arg: {}'.format(
-                    self._format_type_in_doc(namespace, arg_data_type)))
+                arg_doc = cast(UserDefined, arg_data_type).doc
+                if arg_doc:
+                    add_line((':param arg: {}'.format(
+                        self._process_doc(arg_doc)), '    '))
+                add_line((_TYPE_ARG_DOC_FMT %
+                          self._format_type_in_doc(namespace, arg_data_type), None))
 
         if overview and not (extra_request_args or fields):
             # Only output an empty line if we had an overview and haven't
             # started a section on declaring types.
-            self.emit()
+            add_line(('', None))
 
         if extra_return_arg:
             # Special case where the function returns a tuple. The first
             # element is the JSON response. The second element is the
             # the extra_return_arg param.
-            args = []
-            if is_void_type(result_data_type):
-                args.append('None')
+            if result_is_void:
+                rtype = 'None'
             else:
                 rtype = self._format_type_in_doc(namespace,
                                                  result_data_type)
-                args.append(rtype)
-            args.append(extra_return_arg)
-            self.generate_multiline_list(args, ':rtype: ')
+            add_line((_RTYPE_DOC_FMT % ('(%s,' % rtype), None))
+            add_line(('         {})'.format(extra_return_arg), None))
         else:
-            if is_void_type(result_data_type):
-                self.emit(':rtype: None')
+            if result_is_void:
+                add_line((':rtype: None', None))
             else:
                 rtype = self._format_type_in_doc(namespace, result_data_type)
-                self.emit(':rtype: {}'.format(rtype))
+                add_line((_RTYPE_DOC_FMT % rtype, None))
 
-        if not is_void_type(error_data_type) and error_data_type.fields:
-            self.emit(':raises: :class:`{}`'.format(self.args.error_class_path))
-            self.emit()
+        if not is_void_type(error_data_type) and cast(UserDefined, error_data_type).fields:
+            add_line((':raises: :class:`{}`'.format(self.args.error_class_path), None))
+            add_line(('', None))
             # To provide more clarity to a dev who reads the docstring, suggest
             # the route's error class. This is confusing, however, because we
             # don't know where the error object that's raised will store
             # the more detailed route error defined in stone.
             error_class_name = self.args.error_class_path.rsplit('.', 1)[-1]
-            self.emit('If this raises, {} will contain:'.format(error_class_name))
-            with self.indent():
-                self.emit(self._format_type_in_doc(namespace, error_data_type))
+            add_line(('If this raises, {} will contain:'.format(error_class_name), None))
+            add_line(('    ' + self._format_type_in_doc(namespace, error_data_type), None))
 
         if footer:
-            self.emit()
-            self.emit_wrapped_text(footer)
-        self.emit('"""')
+            add_line(('', None))
+            add_line((footer, ''))
+        add_line(('"""', None))
+        self._emit_docstring_lines(lines)
+
+    def _emit_docstring_lines(self, lines):
+        # type: (typing.List[DocstringLine]) -> None
+        """
+        Emits the (text, subsequent_prefix) pairs built up by
+        _generate_docstring_for_func() as a single block.
+
+        Wrapping matches emit_wrapped_text(), but a single TextWrapper is
+        reused for every line instead of constructing one per call.
+        """
+        indent = self.make_indent()
+        wrapper = textwrap.TextWrapper(
+            width=80,
+            initial_indent=indent,
+            break_long_words=False,
+            break_on_hyphens=False,
+        )
+        out = []
+        for text, subsequent_prefix in lines:
+            if subsequent_prefix is None:
+                out.append(indent + text + '\n' if text else '\n')
+            else:
+                wrapper.subsequent_indent = indent + subsequent_prefix
+                out.append(wrapper.fill(text) + '\n')
+        self.emit_raw(''.join(out))
+
+    def _process_doc(self, doc):
+        # type: (typing.Text) -> typing.Text
+        """
+        Converts the doc references in a Stone doc with _docf(). The result
+        depends on the current namespace, so it is cached per namespace.
+        """
+        assert self.cur_namespace is not None
+        key = (self.cur_namespace.name, doc)
+        try:
+            return self._processed_doc_cache[key]
+        except KeyError:
+            pass
+        processed = self.process_doc(doc, self._docf)
+        self._processed_doc_cache[key] = processed
+        return processed
 
     def _docf(self, tag, val):
+        # type: (typing.Text, typing.Text) -> typing.Text
         """
         Callback used as the handler argument to process_docs(). This converts
         Babel doc references to Sphinx-friendly annotations.
         """
-        if tag == 'type':
-            fq_val = val
-            if '.' not in val:
-                fq_val = self.cur_namespace.name + '.' + fq_val
-            return ':class:`{}.{}`'.format(self.args.types_package, fq_val)
-        elif tag == 'route':
-            if ':' in val:
-                val, version = val.split(':', 1)
-                version = int(version)
-            else:
-                version = 1
-            if '.' in val:
-                return ':meth:`{}`'.format(fmt_func(val, version=version))
-            else:
-                return ':meth:`{}_{}`'.format(
-                    self.cur_namespace.name, fmt_func(val, version=version))
-        elif tag == 'link':
-            anchor, link = val.rsplit(' ', 1)
-            return '`{} <{}>`_'.format(anchor, link)
-        elif tag == 'val':
-            if val == 'null':
-                return 'None'
-            elif val == 'true' or val == 'false':
-                return '``{}``'.format(val.capitalize())
-            else:
-                return val
-        elif tag == 'field':
-            return '``{}``'.format(val)
-        else:
+        handler = self._doc_tag_handlers.get(tag)
+        if handler is None:
             raise RuntimeError('Unknown doc ref tag %r' % tag)
+        return handler(self, val)
+
+    def _docf_type(self, val):
+        # type: (typing.Text) -> typing.Text
+        assert self.args is not None and self.cur_namespace is not None
+        fq_val = val
+        if '.' not in val:
+            fq_val = self.cur_namespace.name + '.' + fq_val
+        return ':class:`{}.{}`'.format(self.args.types_package, fq_val)
+
+    def _docf_route(self, val):
+        # type: (typing.Text) -> typing.Text
+        assert self.cur_namespace is not None
+        if ':' in val:
+            val, version_str = val.split(':', 1)
+            version = int(version_str)
+        else:
+            version = 1
+        if '.' in val:
+            return ':meth:`{}`'.format(fmt_func(val, version=version))
+        else:
+            return ':meth:`{}_{}`'.format(
+                self.cur_namespace.name, fmt_func(val, version=version))
+
+    def _docf_link(self, val):
+        # type: (typing.Text) -> typing.Text
+        anchor, link = val.rsplit(' ', 1)
+        return '`{} <{}>`_'.format(anchor, link)
+
+    def _docf_val(self, val):
+        # type: (typing.Text) -> typing.Text
+        if val == 'null':
+            return 'None'
+        elif val == 'true' or val == 'false':
+            return '``{}``'.format(val.capitalize())
+        else:
+            return val
+
+    def _docf_field(self, val):
+        # type: (typing.Text) -> typing.Text
+        return '``{}``'.format(val)
+
+    # Maps each doc ref tag to its handler so _docf() does a single lookup
+    # instead of walking a chain of comparisons for every reference.
+    _doc_tag_handlers = {
+        'type': _docf_type,
+        'route': _docf_route,
+        'link': _docf_link,
+        'val': _docf_val,
+        'field': _docf_field,
+    }  # type: typing.Dict[typing.Text, typing.Callable[..., typing.Text]]
 
     def _format_type_in_doc(self, namespace, data_type):
+        # type: (ApiNamespace, DataType) -> typing.Text
         """
         Returns a string that can be recognized by Sphinx as a type reference
         in a docstring.
         """
-        if is_void_type(data_type):
-            return 'None'
-        elif is_user_defined_type(data_type):
-            return ':class:`{}.{}.{}`'.format(
-                self.args.types_package, namespace.name, fmt_type(data_type))
-        elif is_nullable_type(data_type):
-            return 'Nullable[{}]'.format(
-                self._format_type_in_doc(namespace, data_type.data_type),
-            )
-        elif is_list_type(data_type):
-            return 'List[{}]'.format(
-                self._format_type_in_doc(namespace, data_type.data_type),
-            )
-        elif is_map_type(data_type):
-            return 'Map[{}, {}]'.format(
-                self._format_type_in_doc(namespace, data_type.key_data_type),
-                self._format_type_in_doc(namespace, data_type.value_data_type),
-            )
-        else:
-            return fmt_type(data_type)
+        key = (namespace.name, data_type)
+        try:
+            return self._type_in_doc_cache[key]
+        except KeyError:
+            pass
+        formatters = self._type_in_doc_formatters
+        formatter = next(
+            formatters[cls] for cls in type(data_type).__mro__ if cls in formatters)
+        formatted = formatter(self, namespace, data_type)
+        self._type_in_doc_cache[key] = formatted
+        return formatted
+
+    def _format_void_in_doc(self, namespace, data_type):  # pylint: disable=unused-argument
+        # type: (ApiNamespace, Void) -> typing.Text
+        return 'None'
+
+    def _format_user_defined_in_doc(self, namespace, data_type):
+        # type: (ApiNamespace, UserDefined) -> typing.Text
+        assert self.args is not None
+        return _USER_DEFINED_DOC_FMT % (
+            self.args.types_package, namespace.name, fmt_type(data_type))
+
+    def _format_nullable_in_doc(self, namespace, data_type):
+        # type: (ApiNamespace, Nullable) -> typing.Text
+        return _NULLABLE_DOC_FMT % self._format_type_in_doc(
+            namespace, data_type.data_type)
+
+    def _format_list_in_doc(self, namespace, data_type):
+        # type: (ApiNamespace, List) -> typing.Text
+        return _LIST_DOC_FMT % self._format_type_in_doc(
+            namespace, data_type.data_type)
+
+    def _format_map_in_doc(self, namespace, data_type):
+        # type: (ApiNamespace, Map) -> typing.Text
+        return _MAP_DOC_FMT % (
+            self._format_type_in_doc(namespace, data_type.key_data_type),
+            self._format_type_in_doc(namespace, data_type.value_data_type),
+        )
+
+    def _format_primitive_in_doc(self, namespace, data_type):  # pylint: disable=unused-argument
+        # type: (ApiNamespace, DataType) -> typing.Text
+        return fmt_type(data_type)
+
+    # Looked up along the data type's MRO by _format_type_in_doc(). DataType
+    # is the catch-all for primitives.
+    _type_in_doc_formatters = {
+        Void: _format_void_in_doc,
+        UserDefined: _format_user_defined_in_doc,
+        Nullable: _format_nullable_in_doc,
+        List: _format_list_in_doc,
+        Map: _format_map_in_doc,
+        DataType: _format_primitive_in_doc,
+    }  # type: typing.Dict[typing.Type[DataType], typing.Callable[..., typing.Text]]
 
     def _generate_python_value(self, namespace, value):
+        # type: (typing.Optional[ApiNamespace], typing.Any) -> typing.Text
         if is_tag_ref(value):
+            assert namespace is not None
             return '{}.{}.{}'.format(
                 fmt_namespace(namespace.name),
                 class_name_for_data_type(value.union_data_type),
@@ -2,6 +2,7 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 from contextlib import contextmanager
 
+import functools
 import pprint
 
 from stone.backend import Backend, CodeBackend
@@ -71,10 +72,12 @@ def _rename_if_reserved(s):
     else:
         return s
 
+@functools.lru_cache(maxsize=1024)
 def fmt_class(name, check_reserved=False):
     s = fmt_pascal(name)
     return _rename_if_reserved(s) if check_reserved else s
 
+@functools.lru_cache(maxsize=1024)
 def fmt_func(name, check_reserved=False, version=1):
     name = fmt_underscores(name)
     if check_reserved:
@@ -89,6 +92,7 @@ def fmt_obj(o):
 def fmt_type(data_type):
     return _type_table.get(data_type.__class__, fmt_class(data_type.name))
 
+@functools.lru_cache(maxsize=1024)
 def fmt_var(name, check_reserved=False):
     s = fmt_underscores(name)
     return _rename_if_reserved(s) if check_reserved else s
@@ -108,11 +112,12 @@ def check_route_name_conflict(namespace):
     route_by_name = {}
     for route in namespace.routes:
         route_name = fmt_func(route.name, version=route.version)
-        if route_name in route_by_name:
-            other_route = route_by_name[route_name]
+        # A single dict operation both records the route and finds any route
+        # that already claimed the generated name.
+        other_route = route_by_name.setdefault(route_name, route)
+        if other_route is not route:
             raise RuntimeError(
                 'There is a name conflict between {!r} and {!r}'.format(other_route, route))
-        route_by_name[route_name] = route
 
 TYPE_IGNORE_COMMENT = "  # type: ignore"
 
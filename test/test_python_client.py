@@ -1,9 +1,15 @@
+import io
+import os
+import shutil
+import tempfile
 import textwrap
 
 from stone.backends.python_client import PythonClientBackend
 from stone.ir import (
+    Api,
     ApiNamespace,
     ApiRoute,
+    DeprecationInfo,
     Int32,
     List,
     Map,
@@ -188,6 +194,37 @@ class TestGeneratedPythonClient(unittest.TestCase):
 
         self.assertEqual(result, expected)
 
+    def test_route_with_auth_mode_no_attrs(self):
+        # type: () -> None
+
+        route1 = ApiRoute('a', 1, None)
+        route1.set_attributes(None, None, Void(), Void(), Void(), None)
+        route2 = ApiRoute('b', 1, None)
+        route2.set_attributes(None, None, Void(), Void(), Void(), {'auth': 'user'})
+        ns = ApiNamespace('files')
+        ns.add_route(route1)
+        ns.add_route(route2)
+
+        result = self._evaluate_namespace_with_auth_mode(ns, 'user')
+
+        expected = textwrap.dedent('''\
+            # ------------------------------------------
+            # Routes in files namespace
+
+            def files_b(self):
+                arg = None
+                r = self.request(
+                    files.b,
+                    'files',
+                    arg,
+                    None,
+                )
+                return None
+
+        ''')
+
+        self.assertEqual(result, expected)
+
     def test_route_with_version_number_name_conflict(self):
         # type: () -> None
 
@@ -205,6 +242,40 @@ class TestGeneratedPythonClient(unittest.TestCase):
             'There is a name conflict between {!r} and {!r}'.format(route1, route2),
             str(cm.exception))
 
+    def _generate_module(self, ns, auth_mode):
+        # type: (ApiNamespace, str) -> typing.Text
+
+        api = Api(version='0.1b1')
+        api.namespaces[ns.name] = ns
+        output_dir = tempfile.mkdtemp()
+        try:
+            backend = PythonClientBackend(
+                target_folder_path=output_dir,
+                args=['-w', auth_mode, '-m', 'base', '-c', 'DropboxBase', '-t', 'dropbox'])
+            backend.generate(api)
+            with io.open(os.path.join(output_dir, 'base.py'), encoding='utf-8') as f:
+                return f.read()
+        finally:
+            shutil.rmtree(output_dir)
+
+    def test_warnings_import_only_for_generated_deprecated_routes(self):
+        # type: () -> None
+
+        route1 = ApiRoute('get_metadata', 1, None)
+        route1.set_attributes(DeprecationInfo(), None, Void(), Void(), Void(),
+                              {'auth': 'app'})
+        route2 = ApiRoute('get_metadata', 2, None)
+        route2.set_attributes(None, None, Void(), Void(), Void(),
+                              {'auth': 'user, app'})
+        ns = ApiNamespace('files')
+        ns.add_route(route1)
+        ns.add_route(route2)
+
+        self.assertNotIn('import warnings', self._generate_module(ns, 'user'))
+        result = self._generate_module(ns, 'app')
+        self.assertIn('from abc import ABCMeta, abstractmethod\nimport warnings\n', result)
+        self.assertIn('warnings.warn(', result)
+
     def test_route_argument_doc_string(self):
         backend = PythonClientBackend(
             target_folder_path='output',
@@ -218,4 +289,14 @@ class TestGeneratedPythonClient(unittest.TestCase):
         self.assertEqual(backend._format_type_in_doc(ns, Map(String(), Int32())),
                          'Map[str, int]')
 
+    def test_route_argument_doc_string_nested(self):
+        backend = PythonClientBackend(
+            target_folder_path='output',
+            args=['-m', 'files', '-c', 'DropboxBase', '-t', 'dropbox'])
+        ns = ApiNamespace('files')
+        data_type = Nullable(Map(String(), List(Nullable(Int32()))))
+        expected = 'Nullable[Map[str, List[Nullable[int]]]]'
+        self.assertEqual(backend._format_type_in_doc(ns, data_type), expected)
+        self.assertIn((ns.name, data_type), backend._type_in_doc_cache)
+
     # TODO: add more unit tests for client code generation